@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+_kernels.py
+
+Numba kernels used by build_scene_data.py.
+
+Run this file once to ahead-of-time compile them into scene_kernels.*.so next to it:
+    cd orbital_trajectories/d3/tools
+    python3 _kernels.py
+
+build_scene_data.py imports the compiled module when present, so builds skip the
+JIT warm-up. Otherwise it falls back to @njit(cache=True) on the functions below.
+"""
+
+import os
+
+def interp3(tg, t_obj, pos, out, out_mask):
+    """
+    Linear interpolation of pos[N,3] onto tg in a single merge walk, writing out[M,3].
+    Both tg and t_obj must be sorted; samples outside t_obj get mask False.
+    """
+    n = t_obj.shape[0]
+    j = 0
+    for i in range(tg.shape[0]):
+        t = tg[i]
+        if t < t_obj[0] or t > t_obj[n - 1]:
+            out_mask[i] = False
+            for k in range(3):
+                out[i, k] = 0.0
+            continue
+        while j < n - 2 and t_obj[j + 1] < t:
+            j += 1
+        out_mask[i] = True
+        if n == 1:
+            for k in range(3):
+                out[i, k] = pos[0, k]
+            continue
+        dt = t_obj[j + 1] - t_obj[j]
+        frac = (t - t_obj[j]) / dt if dt != 0.0 else 0.0
+        for k in range(3):
+            out[i, k] = pos[j, k] + frac * (pos[j + 1, k] - pos[j, k])
+
+def main():
+    from numba.pycc import CC
+    cc = CC('scene_kernels')
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+    # times are float64, positions float32 (see build_scene_data.py)
+    cc.export('interp3', 'void(f8[:], f8[:], f4[:,:], f4[:,:], b1[:])')(interp3)
+    cc.compile()
+    print("Wrote scene_kernels to", cc.output_dir)
+
+if __name__ == "__main__":
+    main()
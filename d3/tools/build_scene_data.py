@@ -7,25 +7,39 @@ build_scene_data.py (updated)
 - Optional per-class subsampling (SUBSAMPLE_CATEGORIES / SUBSAMPLE_AMOUNTS)
 - Pruning of objects with very few samples
 - Writes d3/data/scene.json with:
-    { metadata, times_jd, objects: [ {id, class, diameter_km, color, x[], y[], z[], elements? }, ... ] }
+    { metadata, times_jd, objects: [ {id, class, diameter_km, color, x[], y[], z[], valid_mask, elements? }, ... ] }
+- Optional speedups when installed: numpy (parsing/interpolation), numba (interpolation kernel),
+  orjson (JSON writing)
 
 Usage:
     cd orbital_trajectories/d3/tools
+    python3 _kernels.py         # optional, AOT-compiles the numba kernels once
     python3 build_scene_data.py
 """
 
-import os, re, json, math, random
+import os, re, json, math, random, heapq, pickle, hashlib, mmap, base64, glob
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 try:
     import numpy as np
 except Exception:
     np = None
+try:
+    from numba import njit
+except Exception:
+    njit = None
+try:
+    import orjson
+except Exception:
+    orjson = None
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DATA_DIR = os.path.join(ROOT, "data")
 OUT_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 os.makedirs(OUT_DIR, exist_ok=True)
 OUT_FILE = os.path.join(OUT_DIR, "scene.json")
+CACHE_DIR = os.path.join(OUT_DIR, ".cache")
 
 DIAM_TAB = os.path.join(DATA_DIR, "diameters", "tno-centaur_diam-albedo-density", "data", "tno_centaur_diam_alb_dens.tab")
 PLOT_COLORS = os.path.join(DATA_DIR, "plotting_functions", "cat colors.csv")
@@ -52,20 +66,89 @@ MAX_TIME_POINTS = 1000
 # prune objects with fewer valid samples than this
 MIN_SAMPLES = 4
 
+# worker processes for CSV parsing (None = os.cpu_count())
+WORKERS = None
+
 # ---------------------------
 # internal
 # ---------------------------
 
+# Positions are kept as float32 (~7 significant digits, plenty for the viewer);
+# times stay float64 since float32 can't resolve a day at JD ~2.4e6.
+
 float_re = re.compile(r'[+-]?\d+\.\d+(?:[Ee][+-]?\d+)?|[+-]?\d+(?:[Ee][+-]?\d+)?')
 
-def parse_position_csv(path):
-    times, xs, ys, zs = [], [], [], []
+def _load_position_columns(path):
+    """
+    Fast path: let numpy's C parser read the HORIZONS CSV in one go.
+    Column layout is taken from the first non-empty line (the header written
+    by 3_fetch_data.ipynb): first column is JDTDB, the last three non-empty
+    columns are X, Y, Z. Raises on anything it can't handle.
+    """
     with open(path, 'r', encoding='utf-8', errors='ignore') as fh:
+        first = ""
+        skip = 0
         for ln in fh:
-            ln = ln.strip()
-            if not ln:
-                continue
-            floats = float_re.findall(ln)
+            skip += 1
+            first = ln.strip()
+            if first:
+                break
+    cols = [c.strip() for c in first.split(",")]
+    while cols and not cols[-1]:
+        cols.pop()
+    if len(cols) < 4:
+        raise ValueError("not enough columns")
+    try:
+        float(cols[0])
+        skip -= 1       # no header line, data starts right away
+    except ValueError:
+        pass
+    n = len(cols)
+    arr = np.loadtxt(path, delimiter=",", skiprows=skip, usecols=(0, n - 3, n - 2, n - 1),
+                     dtype=np.float64, ndmin=2, encoding='utf-8')
+    arr = arr[np.isfinite(arr).all(axis=1)]
+    if arr.shape[0] == 0:
+        raise ValueError("no rows")
+    return arr
+
+def _iter_lines(path):
+    """
+    Yield the raw (bytes) lines of path from a read-only mmap, so the file isn't
+    copied through a text-mode buffer. Falls back to a plain binary read where
+    mmap isn't possible (e.g. empty files).
+    """
+    with open(path, 'rb') as fh:
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            yield from fh
+            return
+        with mm:
+            yield from iter(mm.readline, b"")
+
+def parse_position_csv(path):
+    if np is not None:
+        try:
+            arr = _load_position_columns(path)
+            return {"times": arr[:, 0].copy(), "pos": arr[:, 1:4].astype(np.float32)}
+        except Exception:
+            pass    # fall back to the line-by-line parser below
+    # typed C buffers instead of lists of boxed floats; pos is flat x,y,z,x,y,z,...
+    times, pos = array('d'), array('d')
+    for ln in _iter_lines(path):
+        ln = ln.strip()
+        if not ln:
+            continue
+        # float() takes ASCII bytes directly, no need to decode the line
+        toks = ln.replace(b",", b" ").split()
+        try:
+            if len(toks) < 4:
+                raise ValueError("fewer than 4 fields")
+            jdt = float(toks[0])
+            x, y, z = map(float, toks[-3:])
+        except (ValueError, IndexError):
+            # last resort: numbers embedded in text
+            floats = float_re.findall(ln.decode('utf-8', errors='ignore'))
             if len(floats) < 4:
                 continue
             try:
@@ -75,13 +158,49 @@ def parse_position_csv(path):
                 z = float(floats[-1])
             except Exception:
                 continue
-            times.append(jdt)
-            xs.append(x)
-            ys.append(y)
-            zs.append(z)
+        # float() also takes nan/inf tokens (and overflows to inf); keep those out of pos
+        if not (math.isfinite(jdt) and math.isfinite(x) and math.isfinite(y) and math.isfinite(z)):
+            continue
+        times.append(jdt)
+        pos.extend((x, y, z))
     if not times:
         return None
-    return {"times": times, "x": xs, "y": ys, "z": zs}
+    if np is not None:
+        return {"times": np.frombuffer(times, dtype=np.float64),
+                "pos": np.frombuffer(pos, dtype=np.float64).reshape(-1, 3).astype(np.float32)}
+    return {"times": times, "pos": pos}
+
+def _cached_parse(path):
+    """
+    parse_position_csv with an on-disk cache: the parsed arrays are saved as
+    CACHE_DIR/<sha1(path)>.<mtime_ns>.npz and loaded from there on later runs
+    until the CSV changes (the stale entry is then replaced).
+    """
+    if np is None:
+        return parse_position_csv(path)
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+    cache = os.path.join(CACHE_DIR, "{}.{}.npz".format(key, os.stat(path).st_mtime_ns))
+    try:
+        with np.load(cache) as npz:
+            return {"times": npz["times"], "pos": npz["pos"]}
+    except Exception:
+        pass
+    parsed = parse_position_csv(path)
+    if parsed is None:
+        return None
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = "{}.{}.tmp".format(cache, os.getpid())
+        with open(tmp, 'wb') as fh:
+            np.savez(fh, times=parsed["times"], pos=parsed["pos"])
+        os.replace(tmp, cache)
+        # drop entries for older versions of this CSV
+        for old in glob.glob(os.path.join(CACHE_DIR, key + ".*.npz")):
+            if old != cache:
+                os.remove(old)
+    except OSError:
+        pass
+    return parsed
 
 def discover_objects(data_dir):
     objects = []
@@ -98,24 +217,79 @@ def discover_objects(data_dir):
                 objects.append({"class": sub, "path": path, "id": objid, "filename": entry})
     return objects
 
-def parse_diameters_tab(tab_path):
+def subsample_objects(objs):
     """
-    Parse diameters table and attempt to extract:
-      - diameter_km
-      - semimajor axis 'a' (AU)
-      - eccentricity 'e'
-      - inclination 'i' (deg)
-    Returns dict name_lower -> dict(e.g. {"diameter_km":..., "a":..., "e":..., "i":...})
+    Apply SUBSAMPLE_CATEGORIES / SUBSAMPLE_AMOUNTS to the discovered files,
+    so the CSVs of dropped objects are never read.
+    """
+    subs = list(SUBSAMPLE_CATEGORIES)
+    if not subs:
+        return objs
+    amounts = list(SUBSAMPLE_AMOUNTS)
+    # pad amounts if needed
+    if len(amounts) < len(subs):
+        amounts = amounts + [amounts[-1]] * (len(subs) - len(amounts))
+    byclass = defaultdict(list)
+    for o in objs:
+        byclass[o["class"]].append(o)
+    out = []
+    for cls, arr in byclass.items():
+        if cls in subs:
+            frac = amounts[subs.index(cls)]
+            n_keep = max(1, int(math.floor(len(arr) * float(frac))))
+            print(f"Subsampling class '{cls}': keeping {n_keep}/{len(arr)} ({frac:.3f})")
+            out.extend(random.sample(arr, n_keep))
+        else:
+            out.extend(arr)
+    return out
+
+# column layout of tno_centaur_diam_alb_dens.tab once split on whitespace
+# (see 2_merge_TNO_diameter_data.ipynb; the provisional designation takes two tokens)
+DIAM_COLS = {"name": 1, "a_AU": 4, "e": 5, "i_deg": 6, "diameter_km": 12}
+
+_row_re = re.compile(r'^\d+')
+_year_re = re.compile(r'^\d{4}$')
+_number_re = re.compile(r'^[+-]?\d+(\.\d+)?([Ee][+-]?\d+)?$')
+_decimal_re = re.compile(r'^[+-]?\d+\.\d+(?:[Ee][+-]?\d+)?$')
+_integer_re = re.compile(r'^[+-]?\d+$')
+
+def _parse_diameters_columns(tab_path):
+    """
+    Fast path: read the fixed-schema table with np.genfromtxt and filter diameters
+    vectorized. Multiple measurements of one object are reduced to their median.
+    Raises if any row doesn't fit the schema.
     """
+    cols = DIAM_COLS
+    arr = np.genfromtxt(tab_path, dtype=None, encoding='latin-1', comments='#',
+                        usecols=(cols["name"], cols["a_AU"], cols["e"], cols["i_deg"], cols["diameter_km"]),
+                        names=("name", "a_AU", "e", "i_deg", "diameter_km"), invalid_raise=True)
+    arr = np.atleast_1d(arr)
+    if arr.size == 0:
+        raise ValueError("no rows")
+    diam = arr["diameter_km"].astype(float)
+    diam_ok = (diam >= 0.05) & (diam <= 50000)
+    info = {}
+    diams = defaultdict(list)
+    for row, d, ok in zip(arr, diam, diam_ok):
+        name = str(row["name"]).strip()
+        if not name or name == "-":
+            continue
+        key = name.lower()
+        info[key] = {"a_AU": float(row["a_AU"]), "e": float(row["e"]), "i_deg": float(row["i_deg"])}
+        if ok:
+            diams[key].append(float(d))
+    for key, vals in diams.items():
+        info[key]["diameter_km"] = float(np.median(vals))
+    return info
+
+def _parse_diameters_heuristic(tab_path):
     info = {}
-    if not os.path.exists(tab_path):
-        return info
     with open(tab_path, 'r', encoding='utf-8', errors='ignore') as fh:
         for ln in fh:
             ln = ln.strip()
             if not ln:
                 continue
-            if not re.match(r'^\d+', ln):
+            if not _row_re.match(ln):
                 continue
             toks = ln.split()
             if len(toks) < 2:
@@ -123,7 +297,7 @@ def parse_diameters_tab(tab_path):
             # find provisional year token (4-digit) if present
             prov_idx = None
             for i, t in enumerate(toks):
-                if re.match(r'^\d{4}$', t):
+                if _year_re.match(t):
                     prov_idx = i
                     break
             if prov_idx is None or prov_idx < 2:
@@ -140,7 +314,7 @@ def parse_diameters_tab(tab_path):
             a = e = inc = None
             numeric_after = []
             for t in toks[search_start:search_start+10]:
-                if re.match(r'^[+-]?\d+(\.\d+)?([Ee][+-]?\d+)?$', t):
+                if _number_re.match(t):
                     try:
                         numeric_after.append(float(t))
                     except:
@@ -150,7 +324,7 @@ def parse_diameters_tab(tab_path):
             # attempt to find diameter (float) anywhere after search_start
             diam = None
             for t in toks[search_start:]:
-                if re.match(r'^[+-]?\d+\.\d+(?:[Ee][+-]?\d+)?$', t):
+                if _decimal_re.match(t):
                     try:
                         v = float(t)
                     except:
@@ -158,7 +332,7 @@ def parse_diameters_tab(tab_path):
                     if 0.05 <= v <= 50000:
                         diam = v
                         break
-                elif re.match(r'^[+-]?\d+$', t):
+                elif _integer_re.match(t):
                     try:
                         v = float(t)
                     except:
@@ -179,6 +353,46 @@ def parse_diameters_tab(tab_path):
                 info[name.lower()] = entry
     return info
 
+def parse_diameters_tab(tab_path):
+    """
+    Parse diameters table and attempt to extract:
+      - diameter_km
+      - semimajor axis 'a' (AU)
+      - eccentricity 'e'
+      - inclination 'i' (deg)
+    Returns dict name_lower -> dict(e.g. {"diameter_km":..., "a":..., "e":..., "i":...})
+    The result is cached in CACHE_DIR and reused while the table's mtime is unchanged.
+    """
+    if not os.path.exists(tab_path):
+        return {}
+    mtime = os.path.getmtime(tab_path)
+    # the two parsers give different results for the same table, so the cache
+    # only counts if it was built by the parser this run would use
+    parser = "columns" if np is not None else "heuristic"
+    cache = os.path.join(CACHE_DIR, "diameters.pickle")
+    try:
+        with open(cache, 'rb') as fh:
+            cached = pickle.load(fh)
+        if cached["path"] == tab_path and cached["mtime"] == mtime and cached["parser"] == parser:
+            return cached["info"]
+    except Exception:
+        pass
+    info = None
+    if parser == "columns":
+        try:
+            info = _parse_diameters_columns(tab_path)
+        except Exception:
+            info = None     # table doesn't match the expected columns
+    if info is None:
+        info = _parse_diameters_heuristic(tab_path)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(cache, 'wb') as fh:
+            pickle.dump({"path": tab_path, "mtime": mtime, "parser": parser, "info": info}, fh)
+    except OSError:
+        pass
+    return info
+
 def parse_cat_colors(csv_path):
     cmap = {}
     if not os.path.exists(csv_path):
@@ -197,78 +411,172 @@ def parse_cat_colors(csv_path):
             cmap[cls] = color
     return cmap
 
-def unify_time_grid(objects_data):
-    all_times = []
-    for obj in objects_data:
-        all_times.extend(obj["times"])
+def unify_time_grid(objects_data, max_points=MAX_TIME_POINTS):
+    """
+    Union of all object sample times. As soon as the union grows past
+    max_points, stop and return a uniform grid of max_points spanning the
+    global [tmin, tmax] instead, so the full union is never built.
+    Each obj["times"] is already sorted.
+    """
+    capped = False
+    if np is not None:
+        times = np.empty(0, dtype=float)
+        for obj in objects_data:
+            times = np.union1d(times, np.asarray(obj["times"], dtype=float))
+            if len(times) > max_points:
+                capped = True
+                break
+    else:
+        times = []
+        for t in heapq.merge(*(obj["times"] for obj in objects_data)):
+            if not times or t != times[-1]:
+                times.append(t)
+                if len(times) > max_points:
+                    capped = True
+                    break
+    if not capped:
+        return times.tolist() if np is not None else times
+    tmin = float(min(obj["times"][0] for obj in objects_data))
+    tmax = float(max(obj["times"][-1] for obj in objects_data))
+    print(f"Unified time grid exceeds {max_points} points. Using a uniform grid over [{tmin}, {tmax}].")
     if np is not None:
-        times = np.unique(np.array(all_times, dtype=float))
-        return times.tolist()
+        return np.linspace(tmin, tmax, max_points).tolist()
+    step = (tmax - tmin) / float(max_points - 1)
+    return [tmin + k * step for k in range(max_points)]
+
+# interpolation kernel: AOT-compiled build if present (python3 _kernels.py),
+# else JIT via numba, else None (numpy fallback below)
+try:
+    from scene_kernels import interp3 as _interp3
+except Exception:
+    if njit is not None:
+        from _kernels import interp3
+        _interp3 = njit(cache=True, fastmath=True)(interp3)
     else:
-        return sorted(set(all_times))
+        _interp3 = None
+
+def _interp_fused(tg, t_obj, pos):
+    """
+    numpy equivalent of _kernels.interp3: one searchsorted over t_obj for all three
+    components. Returns (out[M,3], mask[M]).
+    """
+    mask = (tg >= t_obj[0]) & (tg <= t_obj[-1])
+    if len(t_obj) == 1:
+        return np.repeat(pos[:1], len(tg), axis=0), mask
+    idx = np.clip(np.searchsorted(t_obj, tg), 1, len(t_obj) - 1)
+    t0 = t_obj[idx - 1]
+    dt = t_obj[idx] - t0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frac = np.where(dt != 0, (tg - t0) / dt, 0.0)[:, None]
+    p0 = pos[idx - 1]
+    out = (p0 + frac * (pos[idx] - p0)).astype(pos.dtype)
+    return out, mask
+
+def pack_mask(mask):
+    """
+    Encode a per-sample validity mask as base64 of its packed bits
+    (np.packbits order: first sample in the most significant bit).
+    """
+    if np is not None:
+        packed = np.packbits(np.asarray(mask, dtype=bool)).tobytes()
+    else:
+        packed = bytearray((len(mask) + 7) // 8)
+        for i, v in enumerate(mask):
+            if v:
+                packed[i >> 3] |= 0x80 >> (i & 7)
+    return base64.b64encode(bytes(packed)).decode('ascii')
 
 def interp_to_grid(times_grid, obj):
     if np is not None:
-        t_obj = np.array(obj["times"], dtype=float)
-        x_obj = np.array(obj["x"], dtype=float)
-        y_obj = np.array(obj["y"], dtype=float)
-        z_obj = np.array(obj["z"], dtype=float)
+        t_obj = np.asarray(obj["times"], dtype=float)
+        pos = np.ascontiguousarray(obj["pos"], dtype=np.float32)
         tg = np.array(times_grid, dtype=float)
-        x_interp = np.interp(tg, t_obj, x_obj, left=np.nan, right=np.nan)
-        y_interp = np.interp(tg, t_obj, y_obj, left=np.nan, right=np.nan)
-        z_interp = np.interp(tg, t_obj, z_obj, left=np.nan, right=np.nan)
-        def clean(a):
-            out = []
-            for v in a:
-                if np.isnan(v):
-                    out.append(None)
-                else:
-                    out.append(float(v))
-            return out
-        return clean(x_interp), clean(y_interp), clean(z_interp)
+        if _interp3 is not None:
+            out = np.empty((len(tg), 3), dtype=np.float32)
+            mask = np.empty(tg.shape, dtype=np.bool_)
+            _interp3(tg, t_obj, pos, out, mask)
+        else:
+            out, mask = _interp_fused(tg, t_obj, pos)
+        # dense arrays (0 outside the sampled range) plus the packed validity bitmap
+        out[~mask] = 0.0
+        xs, ys, zs = np.ascontiguousarray(out.T)
+        return xs, ys, zs, pack_mask(mask), int(np.count_nonzero(mask))
+    else:
+        # no numpy: same merge walk as _kernels.interp3 over the sorted grid;
+        # pos is the flat x,y,z buffer from parse_position_csv
+        t_obj = obj["times"]
+        pos = obj["pos"]
+        n = len(t_obj)
+        xs, ys, zs = [], [], []
+        mask = []
+        j = 0
+        for tt in times_grid:
+            if tt < t_obj[0] or tt > t_obj[-1]:
+                xs.append(0.0)
+                ys.append(0.0)
+                zs.append(0.0)
+                mask.append(False)
+                continue
+            mask.append(True)
+            while j < n - 2 and t_obj[j + 1] < tt:
+                j += 1
+            if n == 1:
+                p = pos[0:3]
+            else:
+                t0, t1 = t_obj[j], t_obj[j + 1]
+                p0, p1 = pos[3 * j:3 * j + 3], pos[3 * j + 3:3 * j + 6]
+                frac = (tt - t0) / (t1 - t0) if t1 != t0 else 0.0
+                p = [v0 + frac * (v1 - v0) for v0, v1 in zip(p0, p1)]
+            xs.append(p[0])
+            ys.append(p[1])
+            zs.append(p[2])
+        return xs, ys, zs, pack_mask(mask), sum(mask)
+
+def _json_default(o):
+    # numpy arrays left in the scene by interp_to_grid; they are NaN-free
+    # (gaps live in valid_mask). float32 values are rounded to metres, otherwise
+    # tolist() widens them to float64 and json writes the float32 noise digits.
+    if np is not None and isinstance(o, np.ndarray):
+        if o.dtype == np.float32:
+            return np.round(o.astype(np.float64), 3).tolist()
+        return o.tolist()
+    raise TypeError("Object of type {} is not JSON serializable".format(type(o).__name__))
+
+def write_scene(scene, path):
+    """
+    Write scene.json compactly. x/y/z are dense arrays (0 where there's no data,
+    see each object's valid_mask). Uses orjson, which serializes the numpy arrays
+    natively, when installed, otherwise the stdlib json module via _json_default.
+    """
+    if orjson is not None:
+        with open(path, 'wb') as fh:
+            fh.write(orjson.dumps(scene, option=orjson.OPT_SERIALIZE_NUMPY))
     else:
-        import bisect
-        def interp_list(tg, t_obj, val_obj):
-            out = []
-            for tt in tg:
-                if tt < t_obj[0] or tt > t_obj[-1]:
-                    out.append(None)
-                    continue
-                i = bisect.bisect_left(t_obj, tt)
-                if i < len(t_obj) and abs(t_obj[i] - tt) < 1e-9:
-                    out.append(val_obj[i])
-                else:
-                    if i == 0:
-                        out.append(None)
-                    else:
-                        t0, t1 = t_obj[i-1], t_obj[i]
-                        v0, v1 = val_obj[i-1], val_obj[i]
-                        frac = (tt - t0) / (t1 - t0)
-                        out.append(v0 + frac * (v1 - v0))
-            return out
-        return interp_list(times_grid, obj["times"], obj["x"]), interp_list(times_grid, obj["times"], obj["y"]), interp_list(times_grid, obj["times"], obj["z"])
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(scene, fh, separators=(",", ":"), default=_json_default)
+
+# top-level so it can be pickled for the process pool
+def _parse_one(o):
+    parsed = _cached_parse(o["path"])
+    if parsed is None:
+        return None
+    return {
+        "id": o["id"],
+        "filename": o["filename"],
+        "class": o["class"],
+        "path": os.path.relpath(o["path"], os.path.join(os.path.dirname(__file__), "..")),
+        "times": parsed["times"],
+        "pos": parsed["pos"],
+    }
 
 def main():
     random.seed(RANDOM_SEED)
     print("Discovering objects in:", DATA_DIR)
     objs = discover_objects(DATA_DIR)
     print("Found {} object files.".format(len(objs)))
-    objects_data = []
-    for o in objs:
-        parsed = parse_position_csv(o["path"])
-        if parsed is None:
-            continue
-        entry = {
-            "id": o["id"],
-            "filename": o["filename"],
-            "class": o["class"],
-            "path": os.path.relpath(o["path"], os.path.join(os.path.dirname(__file__), "..")),
-            "times": parsed["times"],
-            "x": parsed["x"],
-            "y": parsed["y"],
-            "z": parsed["z"],
-        }
-        objects_data.append(entry)
+    objs = subsample_objects(objs)
+    with ProcessPoolExecutor(max_workers=WORKERS) as ex:
+        objects_data = [r for r in ex.map(_parse_one, objs, chunksize=8) if r]
     if not objects_data:
         print("No objects parsed. Exiting.")
         return
@@ -288,39 +596,22 @@ def main():
     times_grid = unify_time_grid(objects_data)
     print("Unified grid length:", len(times_grid))
 
-    if len(times_grid) > MAX_TIME_POINTS:
-        print(f"Unified time grid ({len(times_grid)}) exceeds {MAX_TIME_POINTS}. Downsampling uniformly.")
-        if np is not None:
-            idx = np.linspace(0, len(times_grid) - 1, MAX_TIME_POINTS).astype(int)
-            times_grid = [times_grid[i] for i in idx]
-        else:
-            step = (len(times_grid) - 1) / float(MAX_TIME_POINTS - 1)
-            new_times = []
-            for k in range(MAX_TIME_POINTS):
-                i = int(round(k * step))
-                new_times.append(times_grid[max(0, min(i, len(times_grid)-1))])
-            times_grid = sorted(set(new_times), key=new_times.index)
-        print("Downsampled time grid length:", len(times_grid))
-
+    # assemble objects with interpolation, pruning in the same pass. Interpolation
+    # stays in this process: it is cheap next to pickling the grid and every
+    # object's arrays out to pool workers and back.
     scene_objects = []
-    # assemble objects with interpolation
     for o in objects_data:
-        xs, ys, zs = interp_to_grid(times_grid, o)
+        xs, ys, zs, valid_mask, n_valid = interp_to_grid(times_grid, o)
+        if n_valid < MIN_SAMPLES:
+            continue
         diameter = None
         elems = None
-        name_low = o["id"].lower()
-        if name_low in diaminfos:
-            info = diaminfos[name_low]
+        # diaminfos keys are already lower-cased, so one normalization and one lookup per object
+        info = diaminfos.get(o["id"].lower())
+        if info:
             diameter = info.get("diameter_km")
             # collect elements if available
-            if "a_AU" in info or "e" in info or "i_deg" in info:
-                elems = {}
-                if "a_AU" in info:
-                    elems["a_AU"] = info["a_AU"]
-                if "e" in info:
-                    elems["e"] = info["e"]
-                if "i_deg" in info:
-                    elems["i_deg"] = info["i_deg"]
+            elems = {k: info[k] for k in ("a_AU", "e", "i_deg") if k in info} or None
         color = colors.get(o["class"], "#cccccc")
         scene_objects.append({
             "id": o["id"],
@@ -331,45 +622,16 @@ def main():
             "x": xs,
             "y": ys,
             "z": zs,
+            "valid_mask": valid_mask,
             "elements": elems
         })
-
-    # prune objects with too few samples
-    kept = []
-    for obj in scene_objects:
-        valid = sum(1 for v in obj["x"] if v is not None)
-        if valid >= MIN_SAMPLES:
-            kept.append(obj)
-    print(f"Pruned objects with <{MIN_SAMPLES} valid samples. Kept {len(kept)}/{len(scene_objects)} objects.")
-    scene_objects = kept
-
-    # apply per-class subsampling (random)
-    if SUBSAMPLE_CATEGORIES:
-        subs = list(SUBSAMPLE_CATEGORIES)
-        amounts = list(SUBSAMPLE_AMOUNTS)
-        # pad amounts if needed
-        if len(amounts) < len(subs):
-            amounts = amounts + [amounts[-1]] * (len(subs) - len(amounts))
-        byclass = defaultdict(list)
-        for obj in scene_objects:
-            byclass[obj["class"]].append(obj)
-        new_scene_objects = []
-        for cls, arr in byclass.items():
-            if cls in subs:
-                frac = amounts[subs.index(cls)]
-                n_keep = max(1, int(math.floor(len(arr) * float(frac))))
-                print(f"Subsampling class '{cls}': keeping {n_keep}/{len(arr)} ({frac:.3f})")
-                shuffled = arr[:]
-                random.shuffle(shuffled)
-                new_scene_objects.extend(shuffled[:n_keep])
-            else:
-                new_scene_objects.extend(arr)
-        scene_objects = new_scene_objects
+    print(f"Pruned objects with <{MIN_SAMPLES} valid samples. Kept {len(scene_objects)}/{len(objects_data)} objects.")
 
     metadata = {
         "units": "km (assumed)",
         "notes": "Positions parsed from CSV files. Times are JDTDB (Julian Date, TDB). Elements extracted heuristically when available.",
-        "time_count": len(times_grid)
+        "time_count": len(times_grid),
+        "valid_mask": "base64 of the per-time validity bits (np.packbits order, first time in the MSB); x/y/z are 0 where invalid"
     }
 
     scene = {
@@ -379,8 +641,7 @@ def main():
     }
 
     print("Writing scene to", OUT_FILE)
-    with open(OUT_FILE, 'w', encoding='utf-8') as fh:
-        json.dump(scene, fh, indent=2)
+    write_scene(scene, OUT_FILE)
     print("Done. Wrote", OUT_FILE)
     print("Serve d3/ directory via a static server and open index.html.")
 